@@ -17,12 +17,13 @@ MODELS_DIR.mkdir(exist_ok=True)
 
 # Data settings
 CSV_PATH = DATA_DIR / "file_access_logs.csv"
+PARQUET_PATH = DATA_DIR / "file_access_logs.parquet"
 RANDOM_SEED = 42
 
 # ML settings
 DEFAULT_CONTAMINATION = 0.02
-N_ESTIMATORS = 300
-MAX_SAMPLES = "auto"
+N_ESTIMATORS = 100
+MAX_SAMPLES = 256
 
 # UI settings
 PAGE_TITLE = "AI-Powered Anomaly Detection Dashboard"
@@ -32,6 +33,7 @@ LAYOUT = "wide"
 # File types and actions
 FILE_TYPES = ["PDF", "Excel", "Database export", "CSV", "Doc", "PPT", "Image"]
 ACTIONS = ["view", "download"]
+CATEGORICAL_COLUMNS = ["file_type", "action", "user_id"]
 
 # Simulation settings
 DEFAULT_NORMAL_EVENTS = 2500
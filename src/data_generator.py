@@ -2,8 +2,7 @@
 Data generation and simulation utilities for the anomaly detection dashboard
 """
 import os
-import uuid
-import random
+import secrets
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -13,26 +12,44 @@ import logging
 from config import (
     FILE_TYPES, ACTIONS, RANDOM_SEED, DEFAULT_NORMAL_EVENTS, 
     DEFAULT_SUSPICIOUS_EVENTS, DEFAULT_DAYS, WORK_START_HOUR, 
-    WORK_END_HOUR, TYPICAL_HOUR_MEAN, TYPICAL_HOUR_STD
+    WORK_END_HOUR, TYPICAL_HOUR_MEAN, TYPICAL_HOUR_STD, CATEGORICAL_COLUMNS
 )
 
-# Set random seeds
-np.random.seed(RANDOM_SEED)
-random.seed(RANDOM_SEED)
-
 logger = logging.getLogger(__name__)
 
 
+def _batch_uuids(n: int) -> List[str]:
+    """Generate n random (version 4) UUID strings from a single random buffer"""
+    raw = np.frombuffer(secrets.token_bytes(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    hexed = raw.tobytes().hex()
+    return [
+        f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+        for h in (hexed[i:i + 32] for i in range(0, 32 * n, 32))
+    ]
+
+
 class DataGenerator:
     """Handles generation of normal and suspicious file access events"""
     
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = RANDOM_SEED):
+        self.rng = np.random.default_rng(seed)
         self.file_type_weights = [35, 20, 5, 15, 10, 8, 7]  # PDF, Excel, DB, CSV, Doc, PPT, Image
         self.action_weights = [75, 25]  # view, download
+        # Exponential scale and minimum size (MB) per file type
+        self.size_scales = {
+            "Database export": 15, "Excel": 3, "PPT": 3, "Doc": 3,
+            "PDF": 2, "CSV": 2, "Image": 1.5,
+        }
+        self.size_offsets = {
+            "Database export": 10, "Excel": 1, "PPT": 1, "Doc": 1,
+            "PDF": 0.5, "CSV": 0.5, "Image": 0.2,
+        }
     
     def random_user(self) -> str:
         """Generate a random employee ID"""
-        return f"employee{np.random.randint(100, 999)}"
+        return f"employee{self.rng.integers(100, 999)}"
     
     def generate_normal_events(
         self, 
@@ -56,32 +73,38 @@ class DataGenerator:
         
         logger.info(f"Generating {n} normal events over {days} days")
         
-        rows = []
-        for _ in range(n):
-            user = self.random_user()
-            file_type = random.choices(FILE_TYPES, weights=self.file_type_weights)[0]
-            action = random.choices(ACTIONS, weights=self.action_weights)[0]
-            
-            # Generate access time during working hours
-            day_offset = np.random.randint(0, days)
-            hour = int(np.clip(np.random.normal(TYPICAL_HOUR_MEAN, TYPICAL_HOUR_STD), 
-                              WORK_START_HOUR, WORK_END_HOUR))
-            minute = np.random.randint(0, 60)
-            access_time = start_date + timedelta(days=day_offset, hours=hour, minutes=minute)
-            
-            # Generate realistic file sizes
-            file_size = self._generate_file_size(file_type, action)
-            
-            rows.append({
-                "event_id": str(uuid.uuid4()),
-                "user_id": user,
-                "file_type": file_type,
-                "file_size_MB": round(file_size, 3),
-                "access_time": access_time,
-                "action": action,
-            })
-        
-        return pd.DataFrame(rows)
+        # Draw every column in a single vectorized pass
+        file_type_p = np.array(self.file_type_weights) / sum(self.file_type_weights)
+        action_p = np.array(self.action_weights) / sum(self.action_weights)
+        
+        users = np.char.add("employee", self.rng.integers(100, 999, n).astype(str))
+        file_types = self.rng.choice(FILE_TYPES, size=n, p=file_type_p)
+        actions = self.rng.choice(ACTIONS, size=n, p=action_p)
+        
+        # Generate access times during working hours
+        day_offsets = self.rng.integers(0, days, n)
+        hours = np.clip(
+            self.rng.normal(TYPICAL_HOUR_MEAN, TYPICAL_HOUR_STD, n),
+            WORK_START_HOUR, WORK_END_HOUR
+        ).astype(int)
+        minutes = self.rng.integers(0, 60, n)
+        access_times = (
+            np.datetime64(start_date, "s")
+            + day_offsets.astype("timedelta64[D]")
+            + (hours * 60 + minutes).astype("timedelta64[m]")
+        ).astype("datetime64[ns]")
+        
+        # Generate realistic file sizes
+        file_sizes = self._generate_file_size(file_types, actions)
+        
+        return pd.DataFrame({
+            "event_id": _batch_uuids(n),
+            "user_id": users,
+            "file_type": file_types,
+            "file_size_MB": np.round(file_sizes.astype(np.float32), 3),
+            "access_time": access_times,
+            "action": actions,
+        })
     
     def generate_suspicious_events(
         self,
@@ -112,21 +135,16 @@ class DataGenerator:
         else:
             return self._generate_generic_suspicious(n, start_date, label_user)
     
-    def _generate_file_size(self, file_type: str, action: str) -> float:
-        """Generate realistic file size based on type and action"""
-        # Base size multipliers
-        if file_type == "Database export":
-            base = np.random.exponential(scale=15) + 10
-        elif file_type in ["Excel", "PPT", "Doc"]:
-            base = np.random.exponential(scale=3) + 1
-        elif file_type in ["PDF", "CSV"]:
-            base = np.random.exponential(scale=2) + 0.5
-        else:  # Image
-            base = np.random.exponential(scale=1.5) + 0.2
+    def _generate_file_size(self, file_types: np.ndarray, actions: np.ndarray) -> np.ndarray:
+        """Generate realistic file sizes based on type and action"""
+        # Base size multipliers (anything unmapped is treated as an Image)
+        scales = pd.Series(file_types).map(self.size_scales).fillna(1.5).to_numpy()
+        offsets = pd.Series(file_types).map(self.size_offsets).fillna(0.2).to_numpy()
+        base = self.rng.standard_exponential(len(scales)) * scales + offsets
         
         # Downloads are typically larger
-        multiplier = 1.3 if action == "download" else 1.0
-        return float(np.clip(base * multiplier, 0.1, 120.0))
+        multiplier = np.where(np.asarray(actions) == "download", 1.3, 1.0)
+        return np.clip(base * multiplier, 0.1, 120.0)
     
     def _generate_mass_downloads(
         self, 
@@ -135,34 +153,27 @@ class DataGenerator:
         label_user: Optional[str]
     ) -> pd.DataFrame:
         """Generate mass download pattern (after-hours bulk downloads)"""
-        rows = []
-        susp_user = label_user or f"employee{np.random.randint(900, 999)}"
-        base_time = start_date.replace(hour=2, minute=0, second=0, microsecond=0)
-        
-        for i in range(n):
-            offset_min = np.random.randint(0, 180)  # 3-hour window
-            access_time = base_time + timedelta(minutes=offset_min)
-            file_type = random.choices(["PDF", "Database export", "Excel"], weights=[70, 20, 10])[0]
-            action = "download"
-            
-            # Suspicious files are typically larger
-            if file_type == "Database export":
-                file_size = np.random.uniform(50, 300)
-            elif file_type == "PDF":
-                file_size = np.random.uniform(5, 50)
-            else:
-                file_size = np.random.uniform(10, 80)
-            
-            rows.append({
-                "event_id": str(uuid.uuid4()),
-                "user_id": susp_user,
-                "file_type": file_type,
-                "file_size_MB": round(float(file_size), 3),
-                "access_time": access_time,
-                "action": action,
-            })
-        
-        return pd.DataFrame(rows)
+        susp_user = label_user or f"employee{self.rng.integers(900, 999)}"
+        base_time = np.datetime64(start_date.replace(hour=2, minute=0, second=0, microsecond=0), "s")
+        
+        offset_mins = self.rng.integers(0, 180, n)  # 3-hour window
+        access_times = (base_time + offset_mins.astype("timedelta64[m]")).astype("datetime64[ns]")
+        file_types = self.rng.choice(["PDF", "Database export", "Excel"], size=n, p=[0.7, 0.2, 0.1])
+        
+        # Suspicious files are typically larger
+        file_sizes = np.where(
+            file_types == "Database export", self.rng.uniform(50, 300, n),
+            np.where(file_types == "PDF", self.rng.uniform(5, 50, n), self.rng.uniform(10, 80, n))
+        )
+        
+        return pd.DataFrame({
+            "event_id": _batch_uuids(n),
+            "user_id": np.full(n, susp_user, dtype=object),
+            "file_type": file_types,
+            "file_size_MB": np.round(file_sizes.astype(np.float32), 3),
+            "access_time": access_times,
+            "action": np.full(n, "download", dtype=object),
+        })
     
     def _generate_generic_suspicious(
         self, 
@@ -171,65 +182,84 @@ class DataGenerator:
         label_user: Optional[str]
     ) -> pd.DataFrame:
         """Generate generic suspicious pattern (odd hours, mixed types)"""
-        rows = []
-        
-        for i in range(n):
-            user = label_user or self.random_user()
-            day_offset = np.random.randint(0, 3)
-            access_time = (start_date - timedelta(days=day_offset)).replace(
-                hour=3, minute=np.random.randint(0, 60)
-            )
-            file_type = random.choice(FILE_TYPES)
-            action = "download"
-            file_size = np.random.uniform(10, 150)
-            
-            rows.append({
-                "event_id": str(uuid.uuid4()),
-                "user_id": user,
-                "file_type": file_type,
-                "file_size_MB": round(float(file_size), 3),
-                "access_time": access_time,
-                "action": action,
-            })
-        
-        return pd.DataFrame(rows)
+        if label_user:
+            users = np.full(n, label_user, dtype=object)
+        else:
+            users = np.char.add("employee", self.rng.integers(100, 999, n).astype(str))
+        day_offsets = self.rng.integers(0, 3, n)
+        minutes = self.rng.integers(0, 60, n)
+        base_time = np.datetime64(start_date.replace(hour=3, minute=0), "s")
+        access_times = (
+            base_time
+            - day_offsets.astype("timedelta64[D]")
+            + minutes.astype("timedelta64[m]")
+        ).astype("datetime64[ns]")
+        file_types = self.rng.choice(FILE_TYPES, size=n)
+        file_sizes = self.rng.uniform(10, 150, n)
+        
+        return pd.DataFrame({
+            "event_id": _batch_uuids(n),
+            "user_id": users,
+            "file_type": file_types,
+            "file_size_MB": np.round(file_sizes.astype(np.float32), 3),
+            "access_time": access_times,
+            "action": np.full(n, "download", dtype=object),
+        })
 
 
 class DataManager:
     """Handles data loading, saving, and management"""
     
-    def __init__(self, csv_path: str):
+    def __init__(self, csv_path: str, parquet_path: Optional[str] = None, write_csv: bool = False):
         self.csv_path = csv_path
+        self.parquet_path = parquet_path or os.path.splitext(csv_path)[0] + ".parquet"
+        self.write_csv = write_csv
         self.generator = DataGenerator()
     
     def load_or_generate(self) -> pd.DataFrame:
         """Load existing data or generate new dataset"""
+        if os.path.exists(self.parquet_path):
+            logger.info(f"Loading existing data from {self.parquet_path}")
+            df = pd.read_parquet(self.parquet_path)
+            return self.to_categorical(df)
+        
         if os.path.exists(self.csv_path):
+            # Legacy CSV dataset: load it once and migrate it to Parquet
             logger.info(f"Loading existing data from {self.csv_path}")
             df = pd.read_csv(self.csv_path, parse_dates=["access_time"])
+            df = self.to_categorical(df)
+            self.save_data(df)
             return df
         
         logger.info("Generating new dataset")
         # Create initial dataset with normal + suspicious events
-        df_normal = self.generator.generate_normal_events(n=2500, days=10)
-        df_susp = pd.concat([
+        df = pd.concat([
+            self.generator.generate_normal_events(n=2500, days=10),
             self.generator.generate_suspicious_events(n=120, pattern="mass_downloads"),
             self.generator.generate_suspicious_events(n=60, pattern="generic"),
-        ], ignore_index=True)
-        
-        df = pd.concat([df_normal, df_susp], ignore_index=True)
-        df = df.sample(frac=1.0, random_state=RANDOM_SEED).reset_index(drop=True)
+        ], ignore_index=True, copy=False)
+        df = df.sample(frac=1.0, random_state=RANDOM_SEED, ignore_index=True)
+        df = self.to_categorical(df)
         
-        # Save to CSV
-        df.to_csv(self.csv_path, index=False)
-        logger.info(f"Dataset saved to {self.csv_path}")
+        self.save_data(df)
+        return df
+    
+    @staticmethod
+    def to_categorical(df: pd.DataFrame) -> pd.DataFrame:
+        """Store the low-cardinality string columns as pandas categoricals"""
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
         return df
     
     def save_data(self, df: pd.DataFrame) -> None:
-        """Save DataFrame to CSV"""
+        """Save DataFrame to Parquet (and CSV if enabled)"""
         try:
-            df.to_csv(self.csv_path, index=False)
-            logger.info(f"Data saved to {self.csv_path}")
+            df.to_parquet(self.parquet_path, index=False)
+            logger.info(f"Data saved to {self.parquet_path}")
+            if self.write_csv:
+                df.to_csv(self.csv_path, index=False)
+                logger.info(f"Data saved to {self.csv_path}")
         except Exception as e:
             logger.error(f"Failed to save data: {e}")
             raise
@@ -1,18 +1,23 @@
 """
 Main application file for the AI-Powered Anomaly Detection Dashboard
 """
+import io
+import os
 import streamlit as st
+import numpy as np
 import pandas as pd
 import logging
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
 # Import our modules
-from config import CSV_PATH
-from data_generator import DataManager
+from config import CSV_PATH, PARQUET_PATH
+from data_generator import DataGenerator, DataManager
 from ml_pipeline import AnomalyDetector
 from ui_components import DashboardComponents, Visualizations, DataTable
 from utils import (
     setup_logging, SessionStateManager, DataValidator, 
-    PerformanceMonitor, DataExporter, AlertManager, CacheManager
+    PerformanceMonitor, AlertManager, CacheManager, frame_fingerprint,
+    stamp_data_version
 )
 
 # Setup logging
@@ -21,11 +26,102 @@ setup_logging()
 logger = logging.getLogger(__name__)
 
 
+def _append_rows(df: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
+    """Append rows column by column, keeping categorical columns categorical"""
+    combined = pd.DataFrame(
+        {col: np.concatenate([df[col].to_numpy(), new_rows[col].to_numpy()]) for col in df.columns},
+        copy=False,
+    )
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            combined[col] = combined[col].astype("category")
+    return combined
+
+
+def _selection_mask(column: pd.Series, selected: list) -> np.ndarray:
+    """Boolean mask of rows whose value is in selected"""
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        return column.isin(selected).to_numpy()
+    # Look the integer codes up in a per-category table; the trailing False
+    # entry catches code -1 (missing values)
+    allowed = np.zeros(len(column.cat.categories) + 1, dtype=bool)
+    indexer = column.cat.categories.get_indexer(selected)
+    allowed[indexer[indexer >= 0]] = True
+    return allowed[column.cat.codes.to_numpy()]
+
+
+def _prepare_scored(df_scored: pd.DataFrame) -> pd.DataFrame:
+    """Compact the scored frame's dtypes and precompute the calendar columns used by the UI"""
+    df_scored = DataManager.to_categorical(df_scored)
+    for col in ("file_size_MB", "risk_score"):
+        df_scored[col] = df_scored[col].astype(np.float32)
+    access_time = df_scored["access_time"].dt
+    df_scored["hour"] = access_time.hour.astype(np.int8)
+    df_scored["date"] = access_time.date
+    df_scored["day_of_week"] = access_time.day_name().astype("category")
+    # New version token for the UI caches, which key on it instead of hashing values
+    return stamp_data_version(df_scored)
+
+
+def _data_version(data_manager: DataManager) -> float:
+    """Modification time of the dataset on disk (0 when it has not been written yet)"""
+    for path in (data_manager.parquet_path, data_manager.csv_path):
+        if os.path.exists(path):
+            return os.path.getmtime(path)
+    return 0.0
+
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _cached_load(csv_path: str, parquet_path: str, version: float) -> pd.DataFrame:
+    """Cached dataset loading shared across reruns and sessions (keyed on the file's mtime)"""
+    return stamp_data_version(DataManager(csv_path, parquet_path).load_or_generate())
+
+
+def _model_version() -> float:
+    """Modification time of the saved model (0 when none has been saved)"""
+    model_path = AnomalyDetector().model_path
+    return os.path.getmtime(model_path) if model_path.exists() else 0.0
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _cached_detector(contamination: Optional[float], data_hash: int, model_version: float, _df: pd.DataFrame) -> AnomalyDetector:
+    """
+    Detector for a dataset, shared by reference across reruns and sessions
+    
+    With no contamination the saved model is loaded when there is one
+    (model_version changes whenever it is re-saved); otherwise a new model
+    is trained on the dataset.
+    """
+    if contamination is None:
+        detector = AnomalyDetector()
+        if detector.load_model():
+            return detector
+    else:
+        detector = AnomalyDetector(contamination=contamination)
+    detector.fit_and_score(_df)
+    return detector
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _cached_scored(contamination: Optional[float], data_hash: int, model_version: float, _detector: AnomalyDetector, _df: pd.DataFrame) -> pd.DataFrame:
+    """Scored frame for a dataset (each session receives its own copy)"""
+    return _prepare_scored(_detector.predict_new_data(_df))
+
+
+def _detector_and_scores(contamination: Optional[float], df: pd.DataFrame) -> Tuple[AnomalyDetector, pd.DataFrame]:
+    """Cached detector plus the dataset scored by it"""
+    data_hash = frame_fingerprint(df)
+    # Only the load-the-saved-model path depends on what is on disk
+    model_version = _model_version() if contamination is None else 0.0
+    detector = _cached_detector(contamination, data_hash, model_version, df)
+    return detector, _cached_scored(contamination, data_hash, model_version, detector, df)
+
+
 class AnomalyDetectionApp:
     """Main application class"""
     
     def __init__(self):
-        self.data_manager = DataManager(str(CSV_PATH))
+        self.data_manager = DataManager(str(CSV_PATH), str(PARQUET_PATH))
         self.performance_monitor = PerformanceMonitor()
         self.data_validator = DataValidator()
     
@@ -57,24 +153,11 @@ class AnomalyDetectionApp:
             if controls['export_data']:
                 self._export_data()
             
-            # Create filters
-            filters = DashboardComponents.create_filters(st.session_state.df_scored)
-            
-            # Apply filters
-            filtered_df = self._apply_filters(st.session_state.df_scored, filters)
-            
-            # Display summary
-            DashboardComponents.create_summary_cards(filtered_df)
+            # Filters, summary, alerts and tables rerun on their own when a filter changes
+            self._interactive_section(st.session_state.df_scored, controls['show_stats'])
             
-            # Check for high-risk alerts
-            alerts = AlertManager.check_high_risk_events(filtered_df, threshold=80.0)
-            AlertManager.display_alerts(alerts)
-            
-            # Create visualizations
-            self._create_visualizations(filtered_df)
-            
-            # Display data tables
-            self._display_data_tables(filtered_df, controls['show_stats'])
+            # Create visualizations (only rerun on a full app rerun)
+            self._create_visualizations(st.session_state.df_scored)
             
             # Display footer
             self._create_footer()
@@ -84,25 +167,42 @@ class AnomalyDetectionApp:
             st.error(f"An error occurred: {e}")
             st.error("Please check the logs for more details.")
     
+    @st.fragment
+    def _interactive_section(self, df_scored: pd.DataFrame, show_stats: bool):
+        """Filter-driven part of the dashboard, rerun as a fragment"""
+        # Create filters
+        filters = DashboardComponents.create_filters(df_scored)
+        
+        # Apply filters
+        filtered_df = self._apply_filters(df_scored, filters)
+        
+        # Display summary
+        DashboardComponents.create_summary_cards(filtered_df)
+        
+        # Check for high-risk alerts
+        alerts = AlertManager.check_high_risk_events(filtered_df, threshold=80.0)
+        AlertManager.display_alerts(alerts)
+        
+        # Display data tables
+        self._display_data_tables(filtered_df, show_stats)
+    
     def _load_data(self):
         """Load or generate data"""
         self.performance_monitor.start_timer("data_loading")
         
         try:
             if st.session_state.df is None:
-                st.session_state.df = self.data_manager.load_or_generate()
+                st.session_state.df = _cached_load(
+                    self.data_manager.csv_path,
+                    self.data_manager.parquet_path,
+                    _data_version(self.data_manager)
+                )
             
             if st.session_state.model is None or st.session_state.df_scored is None:
-                # Try to load existing model first
-                detector = AnomalyDetector()
-                if not detector.load_model():
-                    # Train new model if no existing model found
-                    detector, st.session_state.df_scored = detector.fit_and_score(st.session_state.df)
-                else:
-                    # Use loaded model to score data
-                    st.session_state.df_scored = detector.predict_new_data(st.session_state.df)
-                
+                # Use the existing model if there is one, otherwise train a new one
+                detector, df_scored = _detector_and_scores(None, st.session_state.df)
                 st.session_state.model = detector
+                st.session_state.df_scored = df_scored
             
             duration = self.performance_monitor.end_timer("data_loading")
             logger.info(f"Data loaded in {duration:.2f}s")
@@ -117,8 +217,8 @@ class AnomalyDetectionApp:
         self.performance_monitor.start_timer("model_training")
         
         try:
-            detector = AnomalyDetector(contamination=contamination)
-            detector, df_scored = detector.fit_and_score(st.session_state.df)
+            # Cached per contamination level, so returning to a previous value is instant
+            detector, df_scored = _detector_and_scores(contamination, st.session_state.df)
             
             st.session_state.model = detector
             st.session_state.df_scored = df_scored
@@ -140,25 +240,27 @@ class AnomalyDetectionApp:
         self.performance_monitor.start_timer("attack_simulation")
         
         try:
-            from data_generator import DataGenerator
-            
-            generator = DataGenerator()
+            # The data manager's generator is re-seeded on every rerun; simulations draw
+            # from an unseeded generator kept for the session so each click is new
+            generator = st.session_state.get("sim_generator")
+            if generator is None:
+                generator = st.session_state.sim_generator = DataGenerator(seed=None)
             new_events = generator.generate_suspicious_events(
                 n=num_events, 
                 label_user=user_id, 
                 pattern="mass_downloads"
             )
             
+            # Score only the new rows against the current model; retraining
+            # on the combined data is left to the "Re-train Model" button
+            new_scored = _prepare_scored(st.session_state.model.predict_new_data(new_events))
+            
             # Combine with existing data
-            combined_df = pd.concat([st.session_state.df, new_events], ignore_index=True)
+            combined_df = stamp_data_version(_append_rows(st.session_state.df, new_events))
             st.session_state.df = combined_df
-            
-            # Retrain model with new data
-            detector = AnomalyDetector()
-            detector, df_scored = detector.fit_and_score(combined_df)
-            
-            st.session_state.model = detector
-            st.session_state.df_scored = df_scored
+            st.session_state.df_scored = stamp_data_version(
+                _append_rows(st.session_state.df_scored, new_scored)
+            )
             
             # Save updated data
             self.data_manager.save_data(combined_df)
@@ -175,19 +277,18 @@ class AnomalyDetectionApp:
     def _export_data(self):
         """Export data to CSV"""
         try:
-            exporter = DataExporter()
-            filepath = exporter.export_to_csv(st.session_state.df_scored)
-            
-            st.success(f"✅ Data exported to {filepath}")
-            
-            # Provide download link
-            with open(filepath, "rb") as f:
-                st.download_button(
-                    label="📥 Download CSV",
-                    data=f.read(),
-                    file_name=filepath.split("/")[-1],
-                    mime="text/csv"
-                )
+            # Write the CSV straight into memory in row batches and hand it to the browser
+            buf = io.BytesIO()
+            st.session_state.df_scored.to_csv(buf, index=False, chunksize=65536)
+            buf.seek(0)
+            
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            st.download_button(
+                label="📥 Download CSV",
+                data=buf,
+                file_name=f"anomaly_data_export_{timestamp}.csv",
+                mime="text/csv"
+            )
                 
         except Exception as e:
             logger.error(f"Error exporting data: {e}")
@@ -195,24 +296,41 @@ class AnomalyDetectionApp:
     
     def _apply_filters(self, df: pd.DataFrame, filters: Dict[str, Any]) -> pd.DataFrame:
         """Apply filters to the dataframe"""
-        filtered_df = df.copy()
+        # Fuse all filters into one boolean mask and select once
+        mask = np.ones(len(df), dtype=bool)
         
         # User filter
         if filters['user_filter']:
-            filtered_df = filtered_df[filtered_df["user_id"].isin(filters['user_filter'])]
+            mask &= _selection_mask(df["user_id"], filters['user_filter'])
         
         # File type filter
         if filters['type_filter']:
-            filtered_df = filtered_df[filtered_df["file_type"].isin(filters['type_filter'])]
+            mask &= _selection_mask(df["file_type"], filters['type_filter'])
         
-        # Anomaly filter
+        # Anomaly and risk threshold filters, evaluated as one expression
+        # (pandas hands this to numexpr when it is installed)
+        numeric_terms = []
         if filters['show_only_anoms']:
-            filtered_df = filtered_df[filtered_df["anomaly_flag"]]
+            numeric_terms.append("anomaly_flag")
+        if "risk_score" in df.columns:
+            numeric_terms.append("risk_score >= @risk_threshold")
+        if numeric_terms:
+            expr = " & ".join(f"({term})" for term in numeric_terms)
+            local_vars = {"risk_threshold": filters['risk_threshold']}
+            mask &= df.eval(expr, local_dict=local_vars).to_numpy(dtype=bool)
         
-        # Risk threshold filter
-        if "risk_score" in filtered_df.columns:
-            filtered_df = filtered_df[filtered_df["risk_score"] >= filters['risk_threshold']]
+        filtered_df = df.loc[mask]
         
+        # The filtered frame's version is the source version plus the filter settings
+        version = df.attrs.get("data_version")
+        if version is not None:
+            stamp_data_version(filtered_df, (
+                version,
+                tuple(filters['user_filter']),
+                tuple(filters['type_filter']),
+                filters['show_only_anoms'],
+                filters['risk_threshold']
+            ))
         return filtered_df
     
     def _create_visualizations(self, df: pd.DataFrame):
@@ -272,6 +390,7 @@ class AnomalyDetectionApp:
         
         with col3:
             st.caption("🔧 **Data Validation**")
+            # validate_dataframe is cached on the frame's data version token
             validation = self.data_validator.validate_dataframe(st.session_state.df)
             if validation["is_valid"]:
                 st.caption("✅ Data integrity verified")
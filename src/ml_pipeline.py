@@ -14,10 +14,26 @@ from typing import Tuple, Dict, Any
 import joblib
 from pathlib import Path
 
-from config import RANDOM_SEED, MODELS_DIR
+from config import RANDOM_SEED, MODELS_DIR, N_ESTIMATORS, MAX_SAMPLES, FILE_TYPES
 
 logger = logging.getLogger(__name__)
 
+# File size thresholds (MB) and the risk score assigned to each bucket
+SIZE_RISK_BINS = np.array([10, 50, 100])
+SIZE_RISK_SCORES = np.array([1, 4, 7, 10], dtype=np.int8)
+
+# File type risk scoring (based on typical sensitivity)
+FILE_TYPE_RISK_SCORES = {
+    "Database export": 10,
+    "PDF": 7,
+    "Excel": 6,
+    "CSV": 5,
+    "Doc": 4,
+    "PPT": 3,
+    "Image": 2
+}
+FILE_TYPE_RISK_LOOKUP = np.array([FILE_TYPE_RISK_SCORES[t] for t in FILE_TYPES] + [np.nan])
+
 
 class FeatureEngineer:
     """Handles feature engineering for the ML pipeline"""
@@ -33,44 +49,48 @@ class FeatureEngineer:
         Returns:
             DataFrame with engineered features
         """
-        df_feat = df.copy()
+        # Carry over only the raw columns the model needs, without copying them
+        df_feat = pd.DataFrame(
+            {col: df[col] for col in ("user_id", "file_type", "action", "file_size_MB")},
+            index=df.index,
+            copy=False,
+        )
         
         # Time-based features
-        df_feat["hour"] = df_feat["access_time"].dt.hour
-        df_feat["dayofweek"] = df_feat["access_time"].dt.dayofweek
-        df_feat["is_weekend"] = df_feat["dayofweek"].isin([5, 6]).astype(int)
-        df_feat["is_after_hours"] = ((df_feat["hour"] < 8) | (df_feat["hour"] > 19)).astype(int)
+        access_time = df["access_time"].dt
+        hours = access_time.hour.to_numpy()
+        dayofweek = access_time.dayofweek.to_numpy()
+        df_feat["hour"] = hours
+        df_feat["dayofweek"] = dayofweek
+        df_feat["is_weekend"] = (dayofweek >= 5).astype(np.int8)
+        df_feat["is_after_hours"] = ((hours < 8) | (hours > 19)).astype(np.int8)
         
         # User behavior features (if we have historical data)
-        user_stats = df_feat.groupby("user_id").agg({
-            "file_size_MB": ["mean", "std", "count"],
-            "action": lambda x: (x == "download").sum()
-        }).round(3)
+        df_feat["_is_download"] = (df_feat["action"].to_numpy() == "download").astype(np.int8)
+        user_stats = df_feat.groupby("user_id", observed=True).agg(
+            avg_file_size=("file_size_MB", "mean"),
+            std_file_size=("file_size_MB", "std"),
+            total_access=("file_size_MB", "count"),
+            download_count=("_is_download", "sum"),
+        ).round(3)
         
-        user_stats.columns = ["avg_file_size", "std_file_size", "total_access", "download_count"]
         user_stats["download_ratio"] = user_stats["download_count"] / user_stats["total_access"]
+        float_stats = ["avg_file_size", "std_file_size", "download_ratio"]
+        user_stats[float_stats] = user_stats[float_stats].astype(np.float32)
         
         df_feat = df_feat.merge(user_stats, left_on="user_id", right_index=True, how="left")
+        df_feat = df_feat.drop(columns="_is_download")
         
-        # File type risk scoring (based on typical sensitivity)
-        file_risk_scores = {
-            "Database export": 10,
-            "PDF": 7,
-            "Excel": 6,
-            "CSV": 5,
-            "Doc": 4,
-            "PPT": 3,
-            "Image": 2
-        }
-        df_feat["file_type_risk"] = df_feat["file_type"].map(file_risk_scores)
+        # File type risk scoring: index the lookup table by categorical codes
+        # (unknown file types get code -1, which selects the trailing NaN)
+        file_type_codes = pd.Categorical(df_feat["file_type"], categories=FILE_TYPES).codes
+        df_feat["file_type_risk"] = FILE_TYPE_RISK_LOOKUP[file_type_codes]
         
         # Size-based features
         df_feat["is_large_file"] = (df_feat["file_size_MB"] > 50).astype(int)
-        df_feat["size_risk_score"] = np.where(
-            df_feat["file_size_MB"] > 100, 10,
-            np.where(df_feat["file_size_MB"] > 50, 7,
-            np.where(df_feat["file_size_MB"] > 10, 4, 1))
-        )
+        # Bucket sizes in one pass: <=10 -> 1, <=50 -> 4, <=100 -> 7, >100 -> 10
+        size_bucket = np.searchsorted(SIZE_RISK_BINS, df_feat["file_size_MB"].to_numpy(), side="left")
+        df_feat["size_risk_score"] = SIZE_RISK_SCORES[size_bucket]
         
         return df_feat
 
@@ -78,33 +98,38 @@ class FeatureEngineer:
 class AnomalyDetector:
     """Main anomaly detection class using Isolation Forest"""
     
-    def __init__(self, contamination: float = 0.02, n_estimators: int = 300):
+    def __init__(self, contamination: float = 0.02, n_estimators: int = N_ESTIMATORS):
         self.contamination = contamination
         self.n_estimators = n_estimators
         self.pipeline = None
         self.feature_columns = None
+        self.raw_min = None
+        self.raw_max = None
         self.model_path = MODELS_DIR / "isolation_forest_model.pkl"
     
     def build_pipeline(self) -> Pipeline:
         """Build the ML pipeline with preprocessing and model"""
-        cat_features = ["file_type", "action", "user_id"]
+        # user_id is represented by the per-user aggregates rather than one-hot
+        # columns, which would grow with the number of users
+        cat_features = ["file_type", "action"]
         num_features = [
             "file_size_MB", "hour", "dayofweek", "is_weekend", 
             "is_after_hours", "file_type_risk", "is_large_file", 
             "size_risk_score", "avg_file_size", "std_file_size", 
-            "download_ratio"
+            "total_access", "download_ratio"
         ]
         
         preprocess = ColumnTransformer(
             transformers=[
-                ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), cat_features),
+                ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=True), cat_features),
                 ("num", "passthrough", num_features),
-            ]
+            ],
+            n_jobs=-1,
         )
         
         iforest = IsolationForest(
             n_estimators=self.n_estimators,
-            max_samples="auto",
+            max_samples=MAX_SAMPLES,
             contamination=self.contamination,
             random_state=RANDOM_SEED,
             n_jobs=-1,
@@ -130,36 +155,44 @@ class AnomalyDetector:
         
         # Build and fit pipeline
         self.pipeline = self.build_pipeline()
-        self.pipeline.fit(df_feat)
+        # Threads share the feature matrix instead of copying it to worker processes
+        with joblib.parallel_config(backend="threading", n_jobs=-1):
+            self.pipeline.fit(df_feat)
         
         # Store feature columns for later use
         self.feature_columns = df_feat.columns.tolist()
         
+        # Preprocess once and reuse the matrix for scoring
+        X = self.pipeline.named_steps["prep"].transform(df_feat)
+        
         # Score samples
-        scores = self.pipeline.named_steps["model"].score_samples(
-            self.pipeline.named_steps["prep"].transform(df_feat)
-        )
+        scores = self.pipeline.named_steps["model"].score_samples(X)
         
-        # Convert to risk scores (0-100)
+        # Convert to risk scores (0-100), remembering the fit-time range
         raw = -scores
-        risk = (raw - raw.min()) / (raw.max() - raw.min() + 1e-9) * 100.0
-        
-        # Get predictions
-        preds = self.pipeline.named_steps["model"].predict(
-            self.pipeline.named_steps["prep"].transform(df_feat)
+        self.raw_min = float(raw.min())
+        self.raw_max = float(raw.max())
+        risk = (raw - self.raw_min) / (self.raw_max - self.raw_min + 1e-9) * 100.0
+        
+        # Derive predictions from the scores (same rule as IsolationForest.predict)
+        offset = self.pipeline.named_steps["model"].offset_
+        preds = np.where(scores < offset, -1, 1)
+        
+        # Create scored dataframe (plus additional features for analysis)
+        # alongside the original columns rather than on a deep copy of them
+        scored_cols = pd.DataFrame({
+            "risk_score": risk.round(2),
+            "anomaly_flag": preds == -1,
+            "hour": df_feat["hour"].to_numpy(),
+            "dayofweek": df_feat["dayofweek"].to_numpy(),
+            "is_weekend": df_feat["is_weekend"].to_numpy(),
+            "is_after_hours": df_feat["is_after_hours"].to_numpy(),
+        }, index=df.index)
+        # Columns from an earlier scoring are replaced rather than duplicated
+        df_scored = pd.concat(
+            [df.drop(columns=scored_cols.columns, errors="ignore"), scored_cols], axis=1, copy=False
         )
         
-        # Create scored dataframe
-        df_scored = df.copy()
-        df_scored["risk_score"] = risk.round(2)
-        df_scored["anomaly_flag"] = preds == -1
-        
-        # Add additional features for analysis
-        df_scored["hour"] = df_feat["hour"]
-        df_scored["dayofweek"] = df_feat["dayofweek"]
-        df_scored["is_weekend"] = df_feat["is_weekend"]
-        df_scored["is_after_hours"] = df_feat["is_after_hours"]
-        
         logger.info(f"Model training completed. Detected {df_scored['anomaly_flag'].sum()} anomalies")
         
         return self.pipeline, df_scored
@@ -189,25 +222,39 @@ class AnomalyDetector:
         # Reorder columns to match training
         df_feat = df_feat[self.feature_columns]
         
+        # Preprocess once and reuse the matrix for scoring
+        X = self.pipeline.named_steps["prep"].transform(df_feat)
+        
         # Score samples
-        scores = self.pipeline.named_steps["model"].score_samples(
-            self.pipeline.named_steps["prep"].transform(df_feat)
-        )
+        scores = self.pipeline.named_steps["model"].score_samples(X)
         
-        # Convert to risk scores
+        # Convert to risk scores on the fit-time scale so they stay comparable across batches
         raw = -scores
-        risk = (raw - raw.min()) / (raw.max() - raw.min() + 1e-9) * 100.0
-        
-        # Get predictions
-        preds = self.pipeline.named_steps["model"].predict(
-            self.pipeline.named_steps["prep"].transform(df_feat)
+        if self.raw_min is None or self.raw_max is None:
+            # Models saved before the range was stored calibrate on their first batch
+            self.raw_min = float(raw.min())
+            self.raw_max = float(raw.max())
+        risk = np.clip((raw - self.raw_min) / (self.raw_max - self.raw_min + 1e-9), 0, 1) * 100.0
+        
+        # Derive predictions from the scores (same rule as IsolationForest.predict)
+        offset = self.pipeline.named_steps["model"].offset_
+        preds = np.where(scores < offset, -1, 1)
+        
+        # Create scored dataframe (with the same analysis features as fit_and_score)
+        # alongside the original columns
+        scored_cols = pd.DataFrame({
+            "risk_score": risk.round(2),
+            "anomaly_flag": preds == -1,
+            "hour": df_feat["hour"].to_numpy(),
+            "dayofweek": df_feat["dayofweek"].to_numpy(),
+            "is_weekend": df_feat["is_weekend"].to_numpy(),
+            "is_after_hours": df_feat["is_after_hours"].to_numpy(),
+        }, index=df.index)
+        # Columns from an earlier scoring are replaced rather than duplicated
+        df_scored = pd.concat(
+            [df.drop(columns=scored_cols.columns, errors="ignore"), scored_cols], axis=1, copy=False
         )
         
-        # Create scored dataframe
-        df_scored = df.copy()
-        df_scored["risk_score"] = risk.round(2)
-        df_scored["anomaly_flag"] = preds == -1
-        
         return df_scored
     
     def save_model(self) -> None:
@@ -219,7 +266,9 @@ class AnomalyDetector:
             'pipeline': self.pipeline,
             'feature_columns': self.feature_columns,
             'contamination': self.contamination,
-            'n_estimators': self.n_estimators
+            'n_estimators': self.n_estimators,
+            'raw_min': self.raw_min,
+            'raw_max': self.raw_max
         }, self.model_path)
         logger.info(f"Model saved to {self.model_path}")
     
@@ -232,19 +281,27 @@ class AnomalyDetector:
                 self.feature_columns = model_data['feature_columns']
                 self.contamination = model_data['contamination']
                 self.n_estimators = model_data['n_estimators']
+                self.raw_min = model_data.get('raw_min')
+                self.raw_max = model_data.get('raw_max')
                 logger.info(f"Model loaded from {self.model_path}")
                 return True
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
         return False
     
-    def evaluate_model(self, df: pd.DataFrame, true_labels: pd.Series = None) -> Dict[str, Any]:
+    def evaluate_model(
+        self,
+        df: pd.DataFrame,
+        true_labels: pd.Series = None,
+        df_feat: pd.DataFrame = None
+    ) -> Dict[str, Any]:
         """
         Evaluate model performance (if true labels are available)
         
         Args:
             df: DataFrame with features
             true_labels: True anomaly labels (if available)
+            df_feat: Precomputed engineered features for df (skips re-engineering)
             
         Returns:
             Dictionary with evaluation metrics
@@ -253,10 +310,10 @@ class AnomalyDetector:
             logger.warning("No true labels provided for evaluation")
             return {}
         
-        df_feat = FeatureEngineer.engineer_features(df)
-        preds = self.pipeline.named_steps["model"].predict(
-            self.pipeline.named_steps["prep"].transform(df_feat)
-        )
+        if df_feat is None:
+            df_feat = FeatureEngineer.engineer_features(df)
+        X = self.pipeline.named_steps["prep"].transform(df_feat)
+        preds = self.pipeline.named_steps["model"].predict(X)
         
         # Convert to binary (1 = normal, 0 = anomaly)
         preds_binary = (preds == 1).astype(int)
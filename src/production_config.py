@@ -17,12 +17,14 @@ MODELS_DIR.mkdir(exist_ok=True)
 
 # Data settings
 CSV_PATH = DATA_DIR / "file_access_logs.csv"
+PARQUET_PATH = DATA_DIR / "file_access_logs.parquet"
 RANDOM_SEED = int(os.getenv("RANDOM_SEED", "42"))
 
 # ML settings - Production optimized
 DEFAULT_CONTAMINATION = float(os.getenv("DEFAULT_CONTAMINATION", "0.02"))
 N_ESTIMATORS = int(os.getenv("N_ESTIMATORS", "100"))  # Reduced for production
-MAX_SAMPLES = os.getenv("MAX_SAMPLES", "auto")
+MAX_SAMPLES = os.getenv("MAX_SAMPLES", "256")
+MAX_SAMPLES = int(MAX_SAMPLES) if MAX_SAMPLES.isdigit() else MAX_SAMPLES
 
 # UI settings
 PAGE_TITLE = os.getenv("PAGE_TITLE", "AI-Powered Anomaly Detection Dashboard")
@@ -32,6 +34,7 @@ LAYOUT = os.getenv("LAYOUT", "wide")
 # File types and actions
 FILE_TYPES = ["PDF", "Excel", "Database export", "CSV", "Doc", "PPT", "Image"]
 ACTIONS = ["view", "download"]
+CATEGORICAL_COLUMNS = ["file_type", "action", "user_id"]
 
 # Simulation settings - Production optimized
 DEFAULT_NORMAL_EVENTS = int(os.getenv("DEFAULT_NORMAL_EVENTS", "1000"))  # Reduced for production
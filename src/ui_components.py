@@ -7,11 +7,103 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Hashable, List, Optional, Tuple
 import logging
 
+from utils import frame_cache_key
+
 logger = logging.getLogger(__name__)
 
+# Maximum number of rows rendered in the styled access log table
+MAX_TABLE_ROWS = 500
+
+
+def _filter_options(column: pd.Series) -> List:
+    """Sorted distinct values of a column, read from the categories when categorical"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Inferred categories are already sorted
+        return column.cat.categories.tolist()
+    return sorted(column.unique())
+
+
+def _most_common_per_user(df: pd.DataFrame, col: str) -> pd.Series:
+    """Most frequent value of a column for each user (ties go to the smallest value)"""
+    counts = df.groupby(["user_id", col], observed=True).size().reset_index(name="count")
+    counts = counts.sort_values(["count", col], ascending=[False, True])
+    return counts.drop_duplicates("user_id").set_index("user_id")[col]
+
+
+# Cached aggregations are keyed on the frame's data version token (set when the
+# app builds or filters a scored frame); untagged frames fall back to a content
+# hash of the columns they read, since the cache is shared by every session
+
+@st.cache_data(show_spinner=False)
+def _top_suspicious_users(key: Hashable, _df: pd.DataFrame, k: int = 3) -> pd.Series:
+    """Users with the most flagged events, with their anomaly counts"""
+    return _df.loc[_df["anomaly_flag"]].groupby("user_id", observed=True).size().nlargest(k)
+
+
+@st.cache_data(show_spinner=False)
+def _top_active_users(key: Hashable, _df: pd.DataFrame, k: int = 10) -> pd.Series:
+    """Most active users, with their event counts"""
+    return _df["user_id"].value_counts().head(k)
+
+
+def _split_histogram(df: pd.DataFrame, column: str, nbins: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Shared bin edges plus counts for normal and anomalous rows of a column"""
+    values = df[column].to_numpy(dtype=np.float64)
+    flags = df["anomaly_flag"].to_numpy(dtype=bool)
+    edges = np.histogram_bin_edges(values, bins=nbins)
+    normal, _ = np.histogram(values[~flags], bins=edges)
+    anomalous, _ = np.histogram(values[flags], bins=edges)
+    return edges, normal, anomalous
+
+
+def _histogram_figure(edges: np.ndarray, traces: List[Tuple[str, np.ndarray, str]], opacity: float) -> go.Figure:
+    """Bar chart of precomputed histogram counts, one trace per (name, counts, color)"""
+    widths = np.diff(edges)
+    centers = edges[:-1] + widths / 2
+    return go.Figure([
+        go.Bar(x=centers, y=counts, width=widths, name=name, marker_color=color, opacity=opacity)
+        for name, counts, color in traces
+    ])
+
+
+def _downloads_by_hour(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Download counts and anomalous download counts per hour of day"""
+    is_download = df["action"] == "download"
+    hour = df["hour"]
+    
+    downloads = hour[is_download].groupby(hour[is_download]).size()
+    downloads = downloads.rename_axis("hour").reset_index(name="count")
+    
+    is_anom = is_download & df["anomaly_flag"]
+    anoms = hour[is_anom].groupby(hour[is_anom]).size()
+    anoms = anoms.rename_axis("hour").reset_index(name="anomaly_count")
+    return downloads, anoms
+
+
+def _activity_by_user_hour(df: pd.DataFrame) -> pd.DataFrame:
+    """Event counts per hour for the 10 most active users"""
+    top_users = _top_active_users(frame_cache_key(df, ("user_id",)), df).index.astype(object)
+    in_top = df["user_id"].isin(top_users).to_numpy()
+    
+    # Scatter-add into a flat (user, hour) grid keyed on user rank * 24 + hour
+    user_codes = pd.Categorical(df["user_id"][in_top], categories=top_users).codes.astype(np.int64)
+    hours = df["hour"].to_numpy()[in_top].astype(np.int64)
+    grid = np.bincount(user_codes * 24 + hours, minlength=len(top_users) * 24)
+    return pd.DataFrame(
+        grid.reshape(len(top_users), 24),
+        index=pd.Index(top_users, name="user_id"),
+        columns=pd.RangeIndex(24, name="hour"),
+    )
+
+
+def _daily_anomalies(df: pd.DataFrame) -> pd.DataFrame:
+    """Number of anomalies per calendar day"""
+    dates = df["date"][df["anomaly_flag"]]
+    return dates.groupby(dates).size().rename_axis("date").reset_index(name="anomaly_count")
+
 
 class DashboardComponents:
     """Main dashboard UI components"""
@@ -97,14 +189,14 @@ class DashboardComponents:
         with col_a:
             user_filter = st.multiselect(
                 "👤 Users", 
-                options=sorted(df["user_id"].unique()),
+                options=_filter_options(df["user_id"]),
                 help="Filter by specific users"
             )
         
         with col_b:
             type_filter = st.multiselect(
                 "📁 File Types", 
-                options=sorted(df["file_type"].unique()),
+                options=_filter_options(df["file_type"]),
                 help="Filter by file types"
             )
         
@@ -141,13 +233,7 @@ class DashboardComponents:
         anom_rate = (total_anoms / total_events * 100) if total_events > 0 else 0
         
         # Most suspicious users
-        susp_users = (
-            df[df["anomaly_flag"]]
-            .groupby("user_id")
-            .size()
-            .sort_values(ascending=False)
-            .head(3)
-        )
+        susp_users = _top_suspicious_users(frame_cache_key(df, ("user_id", "anomaly_flag")), df)
         top_users_str = ", ".join([f"{u} ({c})" for u, c in susp_users.items()]) if len(susp_users) else "None"
         
         # Average risk score
@@ -187,11 +273,52 @@ class Visualizations:
     @staticmethod
     def downloads_per_hour_chart(df: pd.DataFrame):
         """Create downloads per hour chart with anomaly overlay"""
-        tmp = df.copy()
-        tmp["hour"] = tmp["access_time"].dt.hour
+        fig = Visualizations._downloads_per_hour_figure(frame_cache_key(df, ("action", "hour", "anomaly_flag")), df)
+        st.plotly_chart(fig, use_container_width=True, theme=None)
+    
+    @staticmethod
+    def size_distribution_chart(df: pd.DataFrame):
+        """Create file size distribution chart"""
+        fig = Visualizations._size_distribution_figure(frame_cache_key(df, ("file_size_MB", "anomaly_flag")), df)
+        st.plotly_chart(fig, use_container_width=True, theme=None)
+    
+    @staticmethod
+    def risk_score_distribution(df: pd.DataFrame):
+        """Create risk score distribution chart"""
+        if "risk_score" not in df.columns:
+            return
         
-        # Count downloads by hour
-        downloads = tmp[tmp["action"] == "download"].groupby("hour").size().reset_index(name="count")
+        fig = Visualizations._risk_score_figure(frame_cache_key(df, ("risk_score", "anomaly_flag")), df)
+        st.plotly_chart(fig, use_container_width=True, theme=None)
+    
+    @staticmethod
+    def user_activity_heatmap(df: pd.DataFrame):
+        """Create user activity heatmap"""
+        fig = Visualizations._user_activity_figure(frame_cache_key(df, ("user_id", "hour")), df)
+        st.plotly_chart(fig, use_container_width=True, theme=None)
+    
+    @staticmethod
+    def anomaly_timeline(df: pd.DataFrame):
+        """Create timeline of anomalies"""
+        if "anomaly_flag" not in df.columns:
+            return
+        
+        if not df["anomaly_flag"].any():
+            st.info("No anomalies detected in the current dataset")
+            return
+        
+        fig = Visualizations._anomaly_timeline_figure(frame_cache_key(df, ("date", "anomaly_flag")), df)
+        st.plotly_chart(fig, use_container_width=True, theme=None)
+    
+    # Figure builders are cached on the frame's version token, so unchanged charts
+    # are reused across reruns (and sessions) instead of being rebuilt
+    
+    @staticmethod
+    @st.cache_data(show_spinner=False)
+    def _downloads_per_hour_figure(key: Hashable, _df: pd.DataFrame) -> go.Figure:
+        """Build the downloads per hour figure"""
+        # Count downloads (and anomalous downloads) by hour
+        downloads, anoms_grp = _downloads_by_hour(_df)
         
         fig = px.bar(
             downloads, 
@@ -203,121 +330,91 @@ class Visualizations:
         )
         
         # Overlay anomalies as red markers
-        anoms = tmp[(tmp["anomaly_flag"]) & (tmp["action"] == "download")]
-        if not anoms.empty:
-            anoms_grp = anoms.groupby("hour").size().reset_index(name="anomaly_count")
-            if not anoms_grp.empty:
-                scatter = px.scatter(
-                    anoms_grp, 
-                    x="hour", 
-                    y="anomaly_count",
-                    color_discrete_sequence=['red']
-                )
-                scatter.update_traces(
-                    mode="markers", 
-                    marker=dict(size=12, color="red", symbol="x"), 
-                    name="Anomalies"
-                )
-                for trace in scatter.data:
-                    fig.add_trace(trace)
+        if not anoms_grp.empty:
+            scatter = px.scatter(
+                anoms_grp, 
+                x="hour", 
+                y="anomaly_count",
+                color_discrete_sequence=['red']
+            )
+            scatter.update_traces(
+                mode="markers", 
+                marker=dict(size=12, color="red", symbol="x"), 
+                name="Anomalies"
+            )
+            for trace in scatter.data:
+                fig.add_trace(trace)
         
         fig.update_layout(
             legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
             xaxis_title="Hour of Day",
             yaxis_title="Number of Downloads"
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
     
     @staticmethod
-    def size_distribution_chart(df: pd.DataFrame):
-        """Create file size distribution chart"""
-        tmp = df.copy()
-        tmp["label"] = np.where(tmp["anomaly_flag"], "Suspicious", "Normal")
-        
-        fig = px.histogram(
-            tmp,
-            x="file_size_MB",
-            color="label",
-            nbins=60,
-            opacity=0.75,
-            title="📊 File Size Distribution (Normal vs Suspicious)",
-            labels={"file_size_MB": "File Size (MB)", "count": "Number of Files"},
-            color_discrete_map={"Normal": "#1f77b4", "Suspicious": "#ff7f0e"}
+    @st.cache_data(show_spinner=False)
+    def _size_distribution_figure(key: Hashable, _df: pd.DataFrame) -> go.Figure:
+        """Build the file size distribution figure"""
+        # Bin on the server and send only the bar heights to the browser
+        edges, normal, suspicious = _split_histogram(_df, "file_size_MB", 60)
+        
+        fig = _histogram_figure(
+            edges,
+            [("Normal", normal, "#1f77b4"), ("Suspicious", suspicious, "#ff7f0e")],
+            opacity=0.75
         )
         
         fig.update_layout(
+            title="📊 File Size Distribution (Normal vs Suspicious)",
+            legend_title_text="label",
             barmode="overlay",
             xaxis_title="File Size (MB)",
             yaxis_title="Number of Files"
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
     
     @staticmethod
-    def risk_score_distribution(df: pd.DataFrame):
-        """Create risk score distribution chart"""
-        if "risk_score" not in df.columns:
-            return
-        
-        fig = px.histogram(
-            df,
-            x="risk_score",
-            color="anomaly_flag",
-            nbins=50,
-            opacity=0.7,
-            title="🎯 Risk Score Distribution",
-            labels={"risk_score": "Risk Score", "count": "Number of Events"},
-            color_discrete_map={True: "#ff7f0e", False: "#1f77b4"}
+    @st.cache_data(show_spinner=False)
+    def _risk_score_figure(key: Hashable, _df: pd.DataFrame) -> go.Figure:
+        """Build the risk score distribution figure"""
+        edges, normal, anomalous = _split_histogram(_df, "risk_score", 50)
+        
+        fig = _histogram_figure(
+            edges,
+            [("False", normal, "#1f77b4"), ("True", anomalous, "#ff7f0e")],
+            opacity=0.7
         )
         
         fig.update_layout(
+            title="🎯 Risk Score Distribution",
+            legend_title_text="anomaly_flag",
+            barmode="stack",
             xaxis_title="Risk Score",
             yaxis_title="Number of Events"
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
     
     @staticmethod
-    def user_activity_heatmap(df: pd.DataFrame):
-        """Create user activity heatmap"""
-        if "hour" not in df.columns:
-            tmp = df.copy()
-            tmp["hour"] = tmp["access_time"].dt.hour
-        else:
-            tmp = df.copy()
+    @st.cache_data(show_spinner=False)
+    def _user_activity_figure(key: Hashable, _df: pd.DataFrame) -> go.Figure:
+        """Build the user activity heatmap figure"""
+        # Pivot of activity per hour for the top 10 most active users
+        heatmap_data = _activity_by_user_hour(_df)
         
-        # Get top 10 most active users
-        top_users = tmp["user_id"].value_counts().head(10).index
-        
-        # Create pivot table for heatmap
-        heatmap_data = tmp[tmp["user_id"].isin(top_users)].groupby(
-            ["user_id", "hour"]
-        ).size().unstack(fill_value=0)
-        
-        fig = px.imshow(
+        return px.imshow(
             heatmap_data,
             title="🔥 User Activity Heatmap (Top 10 Users)",
             labels={"x": "Hour of Day", "y": "User ID", "color": "Activity Count"},
             aspect="auto"
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
     
     @staticmethod
-    def anomaly_timeline(df: pd.DataFrame):
-        """Create timeline of anomalies"""
-        if "anomaly_flag" not in df.columns:
-            return
-        
-        anoms = df[df["anomaly_flag"]].copy()
-        if anoms.empty:
-            st.info("No anomalies detected in the current dataset")
-            return
-        
+    @st.cache_data(show_spinner=False)
+    def _anomaly_timeline_figure(key: Hashable, _df: pd.DataFrame) -> go.Figure:
+        """Build the daily anomaly timeline figure"""
         # Group by day and count anomalies
-        anoms["date"] = anoms["access_time"].dt.date
-        daily_anoms = anoms.groupby("date").size().reset_index(name="anomaly_count")
+        daily_anoms = _daily_anomalies(_df)
         
         fig = px.line(
             daily_anoms,
@@ -331,8 +428,7 @@ class Visualizations:
             xaxis_title="Date",
             yaxis_title="Number of Anomalies"
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
 
 
 class DataTable:
@@ -353,13 +449,22 @@ class DataTable:
         available_cols = [col for col in show_cols if col in df.columns]
         df_view = df[available_cols].sort_values("access_time", ascending=False).reset_index(drop=True)
         
-        # Apply styling
-        def highlight_anomalies(row):
-            if "anomaly_flag" in row and row["anomaly_flag"]:
-                return ["background-color: #ffd6d6"] * len(row)
-            return [""] * len(row)
+        # Only the most recent rows are styled and shown
+        if len(df_view) > MAX_TABLE_ROWS:
+            st.caption(f"Showing the {MAX_TABLE_ROWS} most recent of {len(df_view)} events")
+            df_view = df_view.head(MAX_TABLE_ROWS)
+        
+        # Apply styling to the whole frame at once
+        def highlight_anomalies(frame):
+            if "anomaly_flag" not in frame.columns:
+                return pd.DataFrame("", index=frame.index, columns=frame.columns)
+            flags = frame["anomaly_flag"].to_numpy(dtype=bool)[:, None]
+            styles = np.where(flags, "background-color: #ffd6d6", "")
+            return pd.DataFrame(
+                np.broadcast_to(styles, frame.shape), index=frame.index, columns=frame.columns
+            )
         
-        styled_df = df_view.style.apply(highlight_anomalies, axis=1)
+        styled_df = df_view.style.apply(highlight_anomalies, axis=None)
         
         st.dataframe(
             styled_df,
@@ -370,7 +475,7 @@ class DataTable:
     @staticmethod
     def create_anomaly_details_table(df: pd.DataFrame):
         """Create detailed table for anomalies only"""
-        anoms = df[df["anomaly_flag"]].copy()
+        anoms = df[df["anomaly_flag"]]
         
         if anoms.empty:
             st.info("No anomalies found in the current dataset")
@@ -378,16 +483,11 @@ class DataTable:
         
         st.markdown("### 🚨 Detailed Anomaly Analysis")
         
-        # Add additional analysis columns
-        anoms["hour"] = anoms["access_time"].dt.hour
-        anoms["day_of_week"] = anoms["access_time"].dt.day_name()
-        
         # Group by user and show summary
-        user_summary = anoms.groupby("user_id").agg({
-            "risk_score": ["mean", "max", "count"],
-            "file_type": lambda x: x.value_counts().index[0],
-            "hour": lambda x: x.mode().iloc[0] if not x.empty else 0
-        }).round(2)
+        user_summary = anoms.groupby("user_id", observed=True)["risk_score"].agg(["mean", "max", "count"])
+        user_summary["file_type"] = _most_common_per_user(anoms, "file_type")
+        user_summary["hour"] = _most_common_per_user(anoms, "hour")
+        user_summary = user_summary.round(2)
         
         user_summary.columns = ["Avg Risk", "Max Risk", "Anomaly Count", "Most Common File Type", "Most Common Hour"]
         user_summary = user_summary.sort_values("Anomaly Count", ascending=False)
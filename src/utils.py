@@ -1,32 +1,65 @@
 """
 Utility functions and helpers for the anomaly detection dashboard
 """
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import streamlit as st
 
+MAX_DISPLAYED_ALERTS = 20
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
 # Configure logging
 def setup_logging(log_level: str = "INFO") -> None:
     """Setup logging configuration"""
+    global _log_listener
     from config import LOGS_DIR
     
+    # Streamlit re-executes the script on every rerun; start the listener only once
+    if _log_listener is not None:
+        return
+    
     # Create logs directory if it doesn't exist
     LOGS_DIR.mkdir(exist_ok=True)
     
-    # Configure logging
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(LOGS_DIR / "anomaly_detection.log")
+    stream_handler = logging.StreamHandler(sys.stdout)
+    file_handler.setFormatter(formatter)
+    stream_handler.setFormatter(formatter)
+    
+    # Log calls only enqueue records; a background listener does the file/stream I/O
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, stream_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    _log_listener = listener
+    
+    # Configure logging (records are formatted once, by the listener's handlers)
     logging.basicConfig(
         level=getattr(logging, log_level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(LOGS_DIR / "anomaly_detection.log"),
-            logging.StreamHandler(sys.stdout)
-        ]
+        format='%(message)s',
+        handlers=[logging.handlers.QueueHandler(log_queue)]
     )
 
 
@@ -43,121 +76,247 @@ class SessionStateManager:
                 st.session_state[key] = None
 
 
+def _count_unique(series: pd.Series) -> int:
+    """Number of distinct values (read straight off the categories for categoricals)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return len(series.cat.categories)
+    return series.nunique()
+
+
+def frame_fingerprint(df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> int:
+    """Content hash of a DataFrame (or of some of its columns), used as a cache key"""
+    if columns is not None:
+        df = df[list(columns)]
+    # Row hashes include the index label, so reordered rows change the key too
+    return int(pd.util.hash_pandas_object(df, index=True).sum())
+
+
+def stamp_data_version(df: pd.DataFrame, version: Optional[Hashable] = None) -> pd.DataFrame:
+    """Tag a DataFrame with a version token (a fresh unique one by default) for cache keys"""
+    df.attrs["data_version"] = uuid.uuid4().hex if version is None else version
+    return df
+
+
+def frame_cache_key(df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> Hashable:
+    """Cache key for a DataFrame: its version token, or a content hash when it has none"""
+    version = df.attrs.get("data_version")
+    if version is not None:
+        return version
+    return frame_fingerprint(df, columns)
+
+
+def validate_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Validate DataFrame structure and content
+    
+    Args:
+        df: DataFrame to validate
+    
+    Returns:
+        Dictionary with validation results
+    """
+    validation_results = {
+        "is_valid": True,
+        "errors": [],
+        "warnings": [],
+        "stats": {}
+    }
+    
+    # One snapshot of the schema serves every column and dtype check below
+    dtypes = dict(df.dtypes)
+    
+    # Required columns
+    required_columns = ["event_id", "user_id", "file_type", "file_size_MB", "access_time", "action"]
+    missing_columns = [col for col in required_columns if col not in dtypes]
+    
+    if missing_columns:
+        validation_results["is_valid"] = False
+        validation_results["errors"].append(f"Missing required columns: {missing_columns}")
+    
+    # Check for empty DataFrame
+    if df.empty:
+        validation_results["is_valid"] = False
+        validation_results["errors"].append("DataFrame is empty")
+        return validation_results
+    
+    has_access_time = "access_time" in dtypes
+    has_file_size = "file_size_MB" in dtypes
+    
+    # Check data types
+    if has_access_time:
+        if not pd.api.types.is_datetime64_any_dtype(dtypes["access_time"]):
+            validation_results["warnings"].append("access_time column is not datetime type")
+    
+    if has_file_size:
+        if not pd.api.types.is_numeric_dtype(dtypes["file_size_MB"]):
+            validation_results["warnings"].append("file_size_MB column is not numeric type")
+    
+    # Check for null values (per-column counts only when any exist)
+    null_mask = df.isna().to_numpy()
+    if null_mask.any():
+        null_counts = {col: int(count) for col, count in zip(df.columns, null_mask.sum(axis=0)) if count}
+        validation_results["warnings"].append(f"Null values found: {null_counts}")
+    
+    # Date range from a single aggregation call
+    start = end = None
+    if has_access_time:
+        start, end = (ts.isoformat() for ts in df["access_time"].agg(["min", "max"]))
+    
+    # Basic statistics
+    validation_results["stats"] = {
+        "total_rows": len(df),
+        "unique_users": _count_unique(df["user_id"]) if "user_id" in dtypes else 0,
+        "unique_file_types": _count_unique(df["file_type"]) if "file_type" in dtypes else 0,
+        "date_range": {
+            "start": start,
+            "end": end
+        }
+    }
+    
+    return validation_results
+
+
+def validate_ml_predictions(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Validate ML model predictions
+    
+    Args:
+        df: DataFrame with predictions
+    
+    Returns:
+        Dictionary with validation results
+    """
+    validation_results = {
+        "is_valid": True,
+        "errors": [],
+        "warnings": [],
+        "stats": {}
+    }
+    
+    # Check for required prediction columns
+    if "risk_score" not in df.columns:
+        validation_results["is_valid"] = False
+        validation_results["errors"].append("Missing risk_score column")
+    
+    if "anomaly_flag" not in df.columns:
+        validation_results["is_valid"] = False
+        validation_results["errors"].append("Missing anomaly_flag column")
+    
+    if not validation_results["is_valid"]:
+        return validation_results
+    
+    n = len(df)
+    
+    # Validate risk scores (each reduction runs once on the raw array and is reused below)
+    scores_numeric = pd.api.types.is_numeric_dtype(df["risk_score"])
+    avg_score = max_score = 0.0
+    if not scores_numeric:
+        validation_results["errors"].append("risk_score column is not numeric")
+    elif n:
+        scores = df["risk_score"].to_numpy(dtype=np.float64, na_value=np.nan)
+        # Skip missing scores like the pandas reductions do, but report them
+        missing = np.isnan(scores)
+        if missing.any():
+            validation_results["warnings"].append(f"risk_score has {int(missing.sum())} missing values")
+            scores = scores[~missing]
+        if scores.size:
+            max_score = float(scores.max())
+            avg_score = float(scores.mean())
+            if scores.min() < 0 or max_score > 100:
+                validation_results["warnings"].append("risk_score values outside expected range [0, 100]")
+    
+    # Validate anomaly flags
+    flags_bool = pd.api.types.is_bool_dtype(df["anomaly_flag"])
+    if not flags_bool:
+        validation_results["warnings"].append("anomaly_flag column is not boolean type")
+    anomalies = int(np.count_nonzero(df["anomaly_flag"].to_numpy())) if flags_bool else 0
+    
+    # Statistics
+    validation_results["stats"] = {
+        "total_predictions": n,
+        "anomalies_detected": anomalies,
+        "anomaly_rate": anomalies / n if flags_bool and n else 0,
+        "avg_risk_score": avg_score if scores_numeric else 0,
+        "max_risk_score": max_score if scores_numeric else 0
+    }
+    
+    return validation_results
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _cached_validate_dataframe(version: Hashable, _df: pd.DataFrame) -> Dict[str, Any]:
+    """validate_dataframe result for one data version"""
+    return validate_dataframe(_df)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _cached_validate_ml_predictions(version: Hashable, _df: pd.DataFrame) -> Dict[str, Any]:
+    """validate_ml_predictions result for one data version"""
+    return validate_ml_predictions(_df)
+
+
 class DataValidator:
     """Validates data integrity and structure"""
     
     @staticmethod
     def validate_dataframe(df: pd.DataFrame) -> Dict[str, Any]:
-        """
-        Validate DataFrame structure and content
-        
-        Args:
-            df: DataFrame to validate
-            
-        Returns:
-            Dictionary with validation results
-        """
-        validation_results = {
-            "is_valid": True,
-            "errors": [],
-            "warnings": [],
-            "stats": {}
-        }
-        
-        # Required columns
-        required_columns = ["event_id", "user_id", "file_type", "file_size_MB", "access_time", "action"]
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            validation_results["is_valid"] = False
-            validation_results["errors"].append(f"Missing required columns: {missing_columns}")
-        
-        # Check for empty DataFrame
-        if df.empty:
-            validation_results["is_valid"] = False
-            validation_results["errors"].append("DataFrame is empty")
-            return validation_results
-        
-        # Check data types
-        if "access_time" in df.columns:
-            if not pd.api.types.is_datetime64_any_dtype(df["access_time"]):
-                validation_results["warnings"].append("access_time column is not datetime type")
-        
-        if "file_size_MB" in df.columns:
-            if not pd.api.types.is_numeric_dtype(df["file_size_MB"]):
-                validation_results["warnings"].append("file_size_MB column is not numeric type")
-        
-        # Check for null values
-        null_counts = df.isnull().sum()
-        if null_counts.any():
-            validation_results["warnings"].append(f"Null values found: {null_counts[null_counts > 0].to_dict()}")
-        
-        # Basic statistics
-        validation_results["stats"] = {
-            "total_rows": len(df),
-            "unique_users": df["user_id"].nunique() if "user_id" in df.columns else 0,
-            "unique_file_types": df["file_type"].nunique() if "file_type" in df.columns else 0,
-            "date_range": {
-                "start": df["access_time"].min().isoformat() if "access_time" in df.columns else None,
-                "end": df["access_time"].max().isoformat() if "access_time" in df.columns else None
-            }
-        }
-        
-        return validation_results
+        """Validate DataFrame structure and content (cached per data version when tagged)"""
+        version = df.attrs.get("data_version")
+        if version is None:
+            return validate_dataframe(df)
+        return _cached_validate_dataframe(version, df)
     
     @staticmethod
     def validate_ml_predictions(df: pd.DataFrame) -> Dict[str, Any]:
-        """
-        Validate ML model predictions
-        
-        Args:
-            df: DataFrame with predictions
-            
-        Returns:
-            Dictionary with validation results
-        """
-        validation_results = {
-            "is_valid": True,
-            "errors": [],
-            "warnings": [],
-            "stats": {}
-        }
-        
-        # Check for required prediction columns
-        if "risk_score" not in df.columns:
-            validation_results["is_valid"] = False
-            validation_results["errors"].append("Missing risk_score column")
-        
-        if "anomaly_flag" not in df.columns:
-            validation_results["is_valid"] = False
-            validation_results["errors"].append("Missing anomaly_flag column")
-        
-        if not validation_results["is_valid"]:
-            return validation_results
-        
-        # Validate risk scores
-        risk_scores = df["risk_score"]
-        if not pd.api.types.is_numeric_dtype(risk_scores):
-            validation_results["errors"].append("risk_score column is not numeric")
-        else:
-            if risk_scores.min() < 0 or risk_scores.max() > 100:
-                validation_results["warnings"].append("risk_score values outside expected range [0, 100]")
-        
-        # Validate anomaly flags
-        anomaly_flags = df["anomaly_flag"]
-        if not pd.api.types.is_bool_dtype(anomaly_flags):
-            validation_results["warnings"].append("anomaly_flag column is not boolean type")
-        
-        # Statistics
-        validation_results["stats"] = {
-            "total_predictions": len(df),
-            "anomalies_detected": int(anomaly_flags.sum()) if pd.api.types.is_bool_dtype(anomaly_flags) else 0,
-            "anomaly_rate": float(anomaly_flags.mean()) if pd.api.types.is_bool_dtype(anomaly_flags) else 0,
-            "avg_risk_score": float(risk_scores.mean()) if pd.api.types.is_numeric_dtype(risk_scores) else 0,
-            "max_risk_score": float(risk_scores.max()) if pd.api.types.is_numeric_dtype(risk_scores) else 0
-        }
-        
-        return validation_results
+        """Validate ML model predictions (cached per data version when tagged)"""
+        version = df.attrs.get("data_version")
+        if version is None:
+            return validate_ml_predictions(df)
+        return _cached_validate_ml_predictions(version, df)
+
+
+class _BatchedLogWriter:
+    """Buffers log lines and emits them as one record per batch from a background thread"""
+    
+    def __init__(self, logger: logging.Logger, max_batch: int = 64, flush_interval: float = 1.0):
+        self.logger = logger
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+    
+    def write(self, line: str) -> None:
+        """Queue a line; the writer flushes every max_batch lines or flush_interval seconds"""
+        with self._lock:
+            self._buffer.append(line)
+            if self._thread is None:
+                # Started on first use so importing this module spawns no threads
+                self._thread = threading.Thread(target=self._drain, name="perf-log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+            full = len(self._buffer) >= self.max_batch
+        if full:
+            self._wakeup.set()
+    
+    def flush(self) -> None:
+        """Write out everything buffered so far"""
+        with self._lock:
+            batch = list(self._buffer)
+            self._buffer.clear()
+        if batch:
+            self.logger.info("\n".join(batch))
+    
+    def _drain(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+# Shared by every PerformanceMonitor (Streamlit builds a new one on each rerun)
+_performance_log = _BatchedLogWriter(logging.getLogger(__name__))
 
 
 class PerformanceMonitor:
@@ -169,26 +328,26 @@ class PerformanceMonitor:
     
     def start_timer(self, operation: str) -> None:
         """Start timing an operation"""
-        self.start_times[operation] = datetime.now()
+        # Monotonic clock: immune to wall-clock adjustments
+        self.start_times[operation] = time.perf_counter_ns()
     
     def end_timer(self, operation: str) -> float:
         """End timing an operation and return duration"""
-        if operation not in self.start_times:
+        start = self.start_times.pop(operation, None)
+        if start is None:
             return 0.0
         
-        duration = (datetime.now() - self.start_times[operation]).total_seconds()
+        duration = (time.perf_counter_ns() - start) / 1e9
         self.metrics[operation] = duration
-        del self.start_times[operation]
         return duration
     
-    def get_metrics(self) -> Dict[str, float]:
-        """Get performance metrics"""
-        return self.metrics.copy()
+    def get_metrics(self) -> Mapping[str, float]:
+        """Get performance metrics (read-only view)"""
+        return MappingProxyType(self.metrics)
     
     def log_performance(self, operation: str, duration: float) -> None:
-        """Log performance metrics"""
-        logger = logging.getLogger(__name__)
-        logger.info(f"Performance - {operation}: {duration:.2f}s")
+        """Log performance metrics (buffered and written in batches)"""
+        _performance_log.write(f"Performance - {operation}: {duration:.2f}s")
 
 
 class DataExporter:
@@ -213,7 +372,9 @@ class DataExporter:
             filename = f"anomaly_data_export_{timestamp}.csv"
         
         filepath = DATA_DIR / filename
-        df.to_csv(filepath, index=False)
+        # One large write buffer instead of Python's default, opened once for all chunks
+        with open(filepath, "w", buffering=1 << 20, encoding="utf-8", newline="") as f:
+            df.to_csv(f, index=False, chunksize=100_000)
         
         logger = logging.getLogger(__name__)
         logger.info(f"Data exported to {filepath}")
@@ -221,34 +382,127 @@ class DataExporter:
         return str(filepath)
     
     @staticmethod
-    def export_anomalies_only(df: pd.DataFrame, filename: str = None) -> str:
+    def export_to_csv_parallel(df: pd.DataFrame, filename: str = None, n_chunks: int = 4) -> List[str]:
         """
-        Export only anomalies to CSV
+        Export DataFrame to CSV as row partitions written concurrently
+        
+        Args:
+            df: DataFrame to export
+            filename: Optional custom base filename (parts get a _000, _001, ... suffix)
+            n_chunks: Number of partitions / writer threads
+            
+        Returns:
+            Paths to the exported part files, in row order
+        """
+        from config import DATA_DIR
+        
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"anomaly_data_export_{timestamp}.csv"
+        
+        base = DATA_DIR / filename
+        n_chunks = max(1, min(n_chunks, len(df)))
+        bounds = np.linspace(0, len(df), n_chunks + 1, dtype=int)
+        filepaths = [base.with_name(f"{base.stem}_{i:03d}.csv") for i in range(n_chunks)]
+        
+        def write_part(i: int) -> None:
+            with open(filepaths[i], "w", buffering=1 << 20, encoding="utf-8", newline="") as f:
+                df.iloc[bounds[i]:bounds[i + 1]].to_csv(f, index=False, chunksize=100_000)
+        
+        with ThreadPoolExecutor(max_workers=n_chunks) as executor:
+            list(executor.map(write_part, range(n_chunks)))
+        
+        logger = logging.getLogger(__name__)
+        logger.info(f"Data exported to {len(filepaths)} files at {base.with_name(base.stem)}_*.csv")
+        
+        return [str(path) for path in filepaths]
+    
+    @staticmethod
+    def export_to_parquet(df: pd.DataFrame, filename: str = None) -> str:
+        """
+        Export DataFrame to Parquet
+        
+        Args:
+            df: DataFrame to export
+            filename: Optional custom filename
+            
+        Returns:
+            Path to exported file
+        """
+        from config import DATA_DIR
+        
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"anomaly_data_export_{timestamp}.parquet"
+        
+        filepath = DATA_DIR / filename
+        df.to_parquet(filepath, compression="zstd", index=False)
+        
+        logger = logging.getLogger(__name__)
+        logger.info(f"Data exported to {filepath}")
+        
+        return str(filepath)
+    
+    @staticmethod
+    def export_anomalies_only(df: pd.DataFrame, filename: str = None, file_format: str = "parquet") -> str:
+        """
+        Export only anomalies to Parquet (or CSV)
         
         Args:
             df: DataFrame with anomaly flags
             filename: Optional custom filename
+            file_format: "parquet" (default) or "csv"
             
         Returns:
             Path to exported file
         """
+        if file_format not in ("parquet", "csv"):
+            raise ValueError(f"Unsupported export format: {file_format}")
+
         if "anomaly_flag" not in df.columns:
             raise ValueError("DataFrame must contain anomaly_flag column")
         
-        anomalies = df[df["anomaly_flag"]].copy()
+        # Written straight to disk, so no defensive copy of the selection is needed
+        anomalies = df.loc[df["anomaly_flag"].to_numpy(dtype=bool)]
         
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"anomalies_only_{timestamp}.csv"
+            filename = f"anomalies_only_{timestamp}.{file_format}"
         
-        return DataExporter.export_to_csv(anomalies, filename)
+        if file_format == "csv":
+            return DataExporter.export_to_csv(anomalies, filename)
+        return DataExporter.export_to_parquet(anomalies, filename)
+
+
+@dataclass
+class Alert:
+    """A high-risk event raised by AlertManager"""
+    __slots__ = ("event_id", "user_id", "risk_score", "file_type", "access_time", "action")
+    
+    event_id: Any
+    user_id: Any
+    risk_score: float
+    file_type: Any
+    access_time: Any
+    action: Any
+
+
+# Alert fields and the value used when a column is missing
+ALERT_DEFAULTS = {
+    "event_id": "unknown",
+    "user_id": "unknown",
+    "risk_score": 0,
+    "file_type": "unknown",
+    "access_time": "unknown",
+    "action": "unknown"
+}
 
 
 class AlertManager:
     """Manages alerts and notifications"""
     
     @staticmethod
-    def check_high_risk_events(df: pd.DataFrame, threshold: float = 80.0) -> List[Dict]:
+    def check_high_risk_events(df: pd.DataFrame, threshold: float = 80.0) -> List[Alert]:
         """
         Check for high-risk events that need immediate attention
         
@@ -262,37 +516,33 @@ class AlertManager:
         if "risk_score" not in df.columns:
             return []
         
-        high_risk = df[df["risk_score"] >= threshold].copy()
+        high_risk = df.iloc[df["risk_score"].to_numpy() >= threshold]
         
-        alerts = []
-        for _, row in high_risk.iterrows():
-            alerts.append({
-                "event_id": row.get("event_id", "unknown"),
-                "user_id": row.get("user_id", "unknown"),
-                "risk_score": row.get("risk_score", 0),
-                "file_type": row.get("file_type", "unknown"),
-                "access_time": row.get("access_time", "unknown"),
-                "action": row.get("action", "unknown")
-            })
-        
-        return alerts
+        # Build slotted records column by column
+        n = len(high_risk)
+        columns = [
+            high_risk[col].tolist() if col in high_risk.columns else repeat(default, n)
+            for col, default in ALERT_DEFAULTS.items()
+        ]
+        return [Alert(*values) for values in zip(*columns)]
     
     @staticmethod
-    def display_alerts(alerts: List[Dict]) -> None:
+    def display_alerts(alerts: List[Alert]) -> None:
         """Display alerts in the UI"""
         if not alerts:
             return
         
         st.warning(f"🚨 {len(alerts)} high-risk events detected!")
         
-        for alert in alerts[:5]:  # Show top 5
-            st.error(
-                f"**User {alert['user_id']}** - Risk Score: {alert['risk_score']:.1f} - "
-                f"{alert['action']} {alert['file_type']} at {alert['access_time']}"
-            )
+        # One table element instead of a widget per alert
+        st.dataframe(
+            pd.DataFrame(alerts[:MAX_DISPLAYED_ALERTS], columns=list(ALERT_DEFAULTS)),
+            use_container_width=True,
+            hide_index=True
+        )
         
-        if len(alerts) > 5:
-            st.info(f"... and {len(alerts) - 5} more high-risk events")
+        if len(alerts) > MAX_DISPLAYED_ALERTS:
+            st.info(f"... and {len(alerts) - MAX_DISPLAYED_ALERTS} more high-risk events")
 
 
 class CacheManager:
@@ -301,18 +551,61 @@ class CacheManager:
     @staticmethod
     @st.cache_data(ttl=300)  # Cache for 5 minutes
     def load_data_cached(csv_path: str) -> pd.DataFrame:
-        """Cached data loading function"""
-        return pd.read_csv(csv_path, parse_dates=["access_time"])
+        """Cached data loading function (backed by a Parquet copy of the CSV on disk)"""
+        from config import CATEGORICAL_COLUMNS
+        
+        csv_file = Path(csv_path)
+        if not csv_file.exists():
+            # CSV export is off by default, so the dataset lives in DataManager's Parquet store
+            from data_generator import DataManager
+            return DataManager(csv_path).load_or_generate()
+        
+        # Kept apart from DataManager's Parquet store (the CSV path with a .parquet suffix)
+        parquet_file = csv_file.with_name(f"{csv_file.stem}.cache.parquet")
+        
+        # Reuse the Parquet copy unless the CSV has changed since it was written
+        if parquet_file.exists() and parquet_file.stat().st_mtime >= csv_file.stat().st_mtime:
+            return pd.read_parquet(parquet_file)
+        
+        # Multithreaded Arrow parser; columns stay NumPy-backed for the rest of the app
+        df = pd.read_csv(csv_file, parse_dates=["access_time"], engine="pyarrow")
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        try:
+            df.to_parquet(parquet_file, compression="zstd", index=False)
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not write Parquet cache {parquet_file}: {e}")
+        return df
     
     @staticmethod
-    @st.cache_data(ttl=600)  # Cache for 10 minutes
-    def process_data_cached(df: pd.DataFrame, contamination: float) -> tuple:
-        """Cached data processing function"""
+    @st.cache_resource(ttl=600, hash_funcs={pd.DataFrame: frame_cache_key})
+    def fit_detector_cached(df: pd.DataFrame, contamination: float):
+        """Cached model fitting (the detector is shared by reference, never pickled)"""
         from ml_pipeline import AnomalyDetector
         
         detector = AnomalyDetector(contamination=contamination)
-        pipeline, df_scored = detector.fit_and_score(df)
+        detector.fit_and_score(df)
+        
+        return detector
+    
+    @staticmethod
+    @st.cache_data(ttl=600, hash_funcs={pd.DataFrame: frame_cache_key})  # Cache for 10 minutes
+    def score_data_cached(df: pd.DataFrame, contamination: float, _detector) -> pd.DataFrame:
+        """Cached scoring function (only the scored DataFrame is serialized)"""
+        # Scores on the fit-time range, so this reproduces fit_and_score's scores
+        df_scored = _detector.predict_new_data(df)
+        # Narrow dtypes shrink the cached payload and every later scan of these columns
+        df_scored["risk_score"] = df_scored["risk_score"].astype(np.float32)
+        df_scored["anomaly_flag"] = df_scored["anomaly_flag"].astype(np.bool_)
+        return df_scored
+    
+    @staticmethod
+    def process_data_cached(df: pd.DataFrame, contamination: float) -> tuple:
+        """Cached data processing function"""
+        detector = CacheManager.fit_detector_cached(df, contamination)
+        df_scored = CacheManager.score_data_cached(df, contamination, detector)
         
-        return pipeline, df_scored
+        return detector.pipeline, df_scored
 
 
@@ -6,9 +6,12 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from data_generator import DataGenerator, DataManager
-from ml_pipeline import AnomalyDetector
-from utils import DataValidator, PerformanceMonitor
+from ml_pipeline import AnomalyDetector, FeatureEngineer
+from utils import DataValidator, PerformanceMonitor, AlertManager, Alert, DataExporter
 import pandas as pd
+import numpy as np
+import tempfile
+from pathlib import Path
 
 def test_data_generation():
     """Test data generation functionality"""
@@ -81,6 +84,222 @@ def test_performance_monitoring():
     metrics = monitor.get_metrics()
     print(f"Performance metrics: {metrics}")
 
+def test_model_persistence():
+    """Test that a saved model keeps its fit-time risk range"""
+    print("\nTesting model persistence...")
+    
+    generator = DataGenerator()
+    df = pd.concat([
+        generator.generate_normal_events(n=200),
+        generator.generate_suspicious_events(n=30)
+    ], ignore_index=True)
+    
+    detector = AnomalyDetector(contamination=0.1)
+    _, df_scored = detector.fit_and_score(df)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        detector.model_path = Path(tmp) / "model.pkl"
+        detector.save_model()
+        
+        loaded = AnomalyDetector()
+        loaded.model_path = detector.model_path
+        assert loaded.load_model(), "Saved model could not be loaded"
+    
+    assert (loaded.raw_min, loaded.raw_max) == (detector.raw_min, detector.raw_max)
+    
+    # Rescoring the training data on the stored range reproduces the fit-time scores
+    rescored = loaded.predict_new_data(df)
+    assert np.allclose(rescored["risk_score"], df_scored["risk_score"])
+    assert (rescored["anomaly_flag"] == df_scored["anomaly_flag"]).all()
+    assert list(rescored.columns).count("risk_score") == 1
+    
+    # New events outside the fit-time range are clipped to [0, 100]
+    extreme = generator.generate_suspicious_events(n=20, pattern="generic")
+    extreme["file_size_MB"] = 10_000.0
+    risk = loaded.predict_new_data(extreme)["risk_score"]
+    assert risk.between(0, 100).all()
+    
+    print(f"Stored score range: [{loaded.raw_min:.4f}, {loaded.raw_max:.4f}]")
+
+def test_alerts():
+    """Test high-risk alert records"""
+    print("\nTesting alerts...")
+    
+    df_scored = test_ml_pipeline()
+    threshold = float(df_scored["risk_score"].quantile(0.9))
+    
+    alerts = AlertManager.check_high_risk_events(df_scored, threshold=threshold)
+    assert len(alerts) == int((df_scored["risk_score"] >= threshold).sum())
+    assert all(isinstance(alert, Alert) for alert in alerts)
+    assert all(alert.risk_score >= threshold for alert in alerts)
+    
+    # Missing columns fall back to defaults
+    alerts = AlertManager.check_high_risk_events(df_scored.drop(columns="event_id"), threshold=threshold)
+    assert all(alert.event_id == "unknown" for alert in alerts)
+    
+    print(f"{len(alerts)} alerts at threshold {threshold:.1f}")
+
+def test_parallel_export():
+    """Test partitioned CSV export"""
+    print("\nTesting parallel CSV export...")
+    
+    generator = DataGenerator()
+    df = generator.generate_normal_events(n=103)
+    
+    paths = DataExporter.export_to_csv_parallel(df, filename="test_parallel_export.csv", n_chunks=4)
+    try:
+        assert [Path(p).name for p in paths] == [f"test_parallel_export_{i:03d}.csv" for i in range(4)]
+        parts = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+        assert len(parts) == len(df)
+        assert parts["event_id"].tolist() == df["event_id"].tolist()
+    finally:
+        for p in paths:
+            Path(p).unlink(missing_ok=True)
+    
+    print(f"Exported {len(df)} rows to {len(paths)} files")
+
+def test_filters():
+    """Test that the fused filter mask matches plain pandas filtering"""
+    print("\nTesting filters...")
+    
+    from main import AnomalyDetectionApp
+    
+    df_scored = test_ml_pipeline()
+    
+    # Select the most flagged user and their flagged file types, so rows remain
+    anoms = df_scored[df_scored["anomaly_flag"]]
+    top_user = anoms["user_id"].value_counts().index[0]
+    users = [top_user, "not_a_user"]
+    types = anoms.loc[anoms["user_id"] == top_user, "file_type"].value_counts().index[:2].tolist()
+    selected = anoms[anoms["user_id"].isin(users) & anoms["file_type"].isin(types)]
+    filters = {
+        "user_filter": users,
+        "type_filter": types,
+        "show_only_anoms": True,
+        "risk_threshold": float(selected["risk_score"].median())
+    }
+    
+    expected = df_scored[
+        df_scored["user_id"].isin(users)
+        & df_scored["file_type"].isin(types)
+        & df_scored["anomaly_flag"]
+        & (df_scored["risk_score"] >= filters["risk_threshold"])
+    ]
+    assert len(expected) > 0
+    
+    # Both the plain isin path and the categorical-code path
+    for frame in (df_scored, DataManager.to_categorical(df_scored.copy())):
+        filtered = AnomalyDetectionApp()._apply_filters(frame, filters)
+        assert filtered.index.equals(expected.index)
+    
+    # Empty selections leave those columns unfiltered
+    unfiltered = dict(filters, user_filter=[], type_filter=[], show_only_anoms=False, risk_threshold=0.0)
+    assert len(AnomalyDetectionApp()._apply_filters(df_scored, unfiltered)) == len(df_scored)
+    
+    print(f"Filtered {len(expected)} of {len(df_scored)} events")
+
+def test_size_risk_boundaries():
+    """Test size_risk_score against the original nested np.where at the bucket edges"""
+    print("\nTesting size risk scoring...")
+    
+    sizes = np.array([0.1, 10.0, 10.001, 50.0, 50.001, 100.0, 100.001, 300.0])
+    df = pd.DataFrame({
+        "user_id": "employee100",
+        "file_type": "PDF",
+        "action": "download",
+        "file_size_MB": sizes,
+        "access_time": pd.Timestamp("2024-01-01 10:00")
+    })
+    
+    scores = FeatureEngineer.engineer_features(df)["size_risk_score"].to_numpy()
+    expected = np.where(sizes > 100, 10, np.where(sizes > 50, 7, np.where(sizes > 10, 4, 1)))
+    assert (scores == expected).all(), f"{scores} != {expected}"
+    
+    # The float32 sizes stored by the generator hit the same buckets
+    scores32 = FeatureEngineer.engineer_features(df.astype({"file_size_MB": np.float32}))["size_risk_score"]
+    assert (scores32.to_numpy() == expected).all()
+    
+    print(f"Size risk scores: {scores.tolist()}")
+
+def test_user_stats():
+    """Test the per-user aggregates against the original lambda-based groupby"""
+    print("\nTesting user statistics...")
+    
+    generator = DataGenerator()
+    df = pd.concat([
+        generator.generate_normal_events(n=300),
+        generator.generate_suspicious_events(n=30)
+    ], ignore_index=True)
+    
+    df_feat = FeatureEngineer.engineer_features(df)
+    
+    expected = df.groupby("user_id").agg({
+        "file_size_MB": ["mean", "std", "count"],
+        "action": lambda x: (x == "download").sum()
+    }).round(3)
+    expected.columns = ["avg_file_size", "std_file_size", "total_access", "download_count"]
+    expected["download_ratio"] = expected["download_count"] / expected["total_access"]
+    expected = expected.loc[df["user_id"]]
+    
+    for col in expected.columns:
+        assert np.allclose(
+            df_feat[col].to_numpy(dtype=np.float64), expected[col].to_numpy(dtype=np.float64),
+            rtol=1e-6, equal_nan=True
+        ), col
+    
+    print(f"User statistics match for {df['user_id'].nunique()} users")
+
+def test_most_common_per_user():
+    """Test the most common file type / hour per user against the original lambdas"""
+    print("\nTesting most common values per user...")
+    
+    from ui_components import _most_common_per_user
+    
+    anoms = pd.DataFrame({
+        "user_id": ["a", "a", "a", "a", "b", "b", "b"],
+        "file_type": ["PDF", "PDF", "Excel", "PDF", "CSV", "PDF", "CSV"],
+        "hour": [9, 2, 9, 2, 7, 1, 7]  # user a has a tie between hours 2 and 9
+    })
+    
+    expected = anoms.groupby("user_id").agg({
+        "file_type": lambda x: x.value_counts().index[0],
+        "hour": lambda x: x.mode().iloc[0] if not x.empty else 0
+    })
+    
+    for frame in (anoms, DataManager.to_categorical(anoms.copy())):
+        for col in ("file_type", "hour"):
+            result = _most_common_per_user(frame, col)
+            assert result.reindex(expected.index).astype(object).tolist() == expected[col].tolist(), col
+    
+    print(f"Most common values: {expected.to_dict(orient='index')}")
+
+def test_activity_heatmap():
+    """Test the bincount heatmap grid against the original groupby/unstack pivot"""
+    print("\nTesting activity heatmap...")
+    
+    from ui_components import _activity_by_user_hour
+    
+    generator = DataGenerator()
+    df = pd.concat([
+        generator.generate_normal_events(n=300),
+        generator.generate_suspicious_events(n=40)
+    ], ignore_index=True)
+    df["hour"] = df["access_time"].dt.hour
+    
+    grid = _activity_by_user_hour(df)
+    
+    top_users = df["user_id"].value_counts().head(10).index
+    expected = df[df["user_id"].isin(top_users)].groupby(
+        ["user_id", "hour"]
+    ).size().unstack(fill_value=0)
+    
+    assert set(grid.index) == set(expected.index)
+    assert grid.shape == (len(expected), 24)
+    expected = expected.reindex(index=grid.index, columns=grid.columns, fill_value=0)
+    assert (grid.to_numpy() == expected.to_numpy()).all()
+    
+    print(f"Heatmap grid: {grid.shape[0]} users x {grid.shape[1]} hours, {int(grid.to_numpy().sum())} events")
+
 def main():
     """Run all tests"""
     print("Running application tests...\n")
@@ -98,6 +317,31 @@ def main():
         # Test performance monitoring
         test_performance_monitoring()
         
+        # Test model persistence
+        test_model_persistence()
+
+        
+        # Test alerts
+        test_alerts()
+        
+        # Test parallel export
+        test_parallel_export()
+        
+        # Test filters
+        test_filters()
+        
+        # Test size risk scoring
+        test_size_risk_boundaries()
+        
+        # Test user statistics
+        test_user_stats()
+        
+        # Test most common values per user
+        test_most_common_per_user()
+        
+        # Test activity heatmap
+        test_activity_heatmap()
+        
         print("\n✅ All tests passed successfully!")
         
     except Exception as e: